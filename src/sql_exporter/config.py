@@ -1,12 +1,35 @@
 """Configuration management for SQL Exporter."""
 
 import os
+import re
+import pickle
+import logging
+import threading
 import yaml
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple, Callable
+from dataclasses import dataclass, field
 
+logger = logging.getLogger(__name__)
 
-@dataclass
+# Prefer the libyaml-backed loader when PyYAML was built with it
+_YAML_LOADER = yaml.CSafeLoader if hasattr(yaml, 'CSafeLoader') else yaml.SafeLoader
+
+# Parsed YAML documents keyed by absolute path, invalidated on (mtime, size) change.
+# The bool records whether the file contains any ${...} placeholder.
+_CONFIG_CACHE_SIZE = 32
+_CONFIG_CACHE: "OrderedDict[str, Tuple[float, int, Dict[str, Any], bool]]" = OrderedDict()
+_CONFIG_CACHE_LOCK = threading.Lock()
+
+# Opt-in on-disk pickle of the parsed YAML, stored next to the config file
+_SIDECAR_SUFFIX = '.cache'
+_SIDECAR_ENV = 'SQL_EXPORTER_CACHE_CONFIG'
+
+# Pattern to match ${VAR} or ${VAR:-default}
+_ENV_VAR_RE = re.compile(r'\$\{([^}]+)\}')
+
+
+@dataclass(slots=True, frozen=True)
 class DatabaseConfig:
     """Database connection configuration."""
     name: str
@@ -35,21 +58,17 @@ class DatabaseConfig:
             raise ValueError(f"Unsupported database driver: {self.driver}")
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class MetricConfig:
     """Metric configuration."""
     name: str
     help: str
     type: str  # gauge, counter, histogram
-    labels: List[str] = None
+    labels: List[str] = field(default_factory=list)
     value_column: str = "value"
 
-    def __post_init__(self):
-        if self.labels is None:
-            self.labels = []
-
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class QueryConfig:
     """SQL query configuration."""
     name: str
@@ -60,7 +79,7 @@ class QueryConfig:
     timeout: int = 30  # seconds
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ExporterConfig:
     """Main exporter configuration."""
     port: int = 9090
@@ -68,7 +87,7 @@ class ExporterConfig:
     log_level: str = "INFO"
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Config:
     """Main configuration container."""
     databases: Dict[str, DatabaseConfig]
@@ -76,6 +95,10 @@ class Config:
     exporter: ExporterConfig
 
 
+def _identity(value):
+    return value
+
+
 class ConfigLoader:
     """Configuration file loader."""
 
@@ -85,23 +108,92 @@ class ConfigLoader:
         if not os.path.exists(config_path):
             raise FileNotFoundError(f"Configuration file not found: {config_path}")
 
-        with open(config_path, 'r', encoding='utf-8') as f:
-            data = yaml.safe_load(f)
+        data, needs_env_expansion = ConfigLoader._load_yaml(config_path)
+        expand = ConfigLoader._expand_env_vars if needs_env_expansion else _identity
+        return ConfigLoader._parse_config(data, expand)
+
+    @staticmethod
+    def _load_yaml(config_path: str) -> Tuple[Dict[str, Any], bool]:
+        """Read YAML document, reusing the cached parse if the file is unchanged.
+
+        Returns the document and whether the raw file contains any ``${``.
+        """
+        path = os.path.abspath(config_path)
+        stat = os.stat(path)
+        mtime, size = stat.st_mtime, stat.st_size
+
+        with _CONFIG_CACHE_LOCK:
+            cached = _CONFIG_CACHE.get(path)
+            if cached is not None and cached[0] == mtime and cached[1] == size:
+                _CONFIG_CACHE.move_to_end(path)
+                return cached[2], cached[3]
 
-        return ConfigLoader._parse_config(data)
+        use_sidecar = os.environ.get(_SIDECAR_ENV) == '1'
+        entry = ConfigLoader._read_sidecar(path, mtime) if use_sidecar else None
+        if entry is None:
+            with open(path, 'rb') as f:
+                raw = f.read()
+            entry = (yaml.load(raw, Loader=_YAML_LOADER) or {}, b'${' in raw)
+            if use_sidecar:
+                ConfigLoader._write_sidecar(path, entry)
+
+        data, needs_env_expansion = entry
+        with _CONFIG_CACHE_LOCK:
+            _CONFIG_CACHE[path] = (mtime, size, data, needs_env_expansion)
+            _CONFIG_CACHE.move_to_end(path)
+            while len(_CONFIG_CACHE) > _CONFIG_CACHE_SIZE:
+                _CONFIG_CACHE.popitem(last=False)
+
+        return data, needs_env_expansion
+
+    @staticmethod
+    def _read_sidecar(path: str, mtime: float) -> Optional[Tuple[Dict[str, Any], bool]]:
+        """Load the pickled YAML document if it is at least as new as the source."""
+        cache_path = path + _SIDECAR_SUFFIX
+        try:
+            if os.path.getmtime(cache_path) < mtime:
+                return None
+            with open(cache_path, 'rb') as f:
+                entry = pickle.load(f)
+            # Sidecars from older versions hold only the document
+            return entry if isinstance(entry, tuple) else None
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable config cache {cache_path}: {e}")
+            return None
 
     @staticmethod
-    def _parse_config(data: Dict[str, Any]) -> Config:
-        """Parse configuration data into Config object."""
+    def _write_sidecar(path: str, entry: Tuple[Dict[str, Any], bool]):
+        """Pickle the parsed YAML document next to the source file."""
+        cache_path = path + _SIDECAR_SUFFIX
+        try:
+            with open(cache_path, 'wb') as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError as e:
+            logger.debug(f"Could not write config cache {cache_path}: {e}")
+
+    @staticmethod
+    def _parse_config(data: Dict[str, Any],
+                      expand: Optional[Callable[[Optional[str]], Optional[str]]] = None) -> Config:
+        """Parse configuration data into Config object.
+
+        ``expand`` performs ${VAR} interpolation on string values; it defaults
+        to ``_expand_env_vars`` and can be the identity when the source has
+        no placeholders.
+        """
+        if expand is None:
+            expand = ConfigLoader._expand_env_vars
+
         # Parse databases with environment variable expansion
         databases = {}
         for name, db_data in data.get('databases', {}).items():
             # Expand environment variables in string values
-            host = ConfigLoader._expand_env_vars(db_data.get('host'))
-            username = ConfigLoader._expand_env_vars(db_data.get('username'))
-            password = ConfigLoader._expand_env_vars(db_data.get('password'))
-            database = ConfigLoader._expand_env_vars(db_data.get('database'))
-            connection_string = ConfigLoader._expand_env_vars(db_data.get('connection_string'))
+            host = expand(db_data.get('host'))
+            username = expand(db_data.get('username'))
+            password = expand(db_data.get('password'))
+            database = expand(db_data.get('database'))
+            connection_string = expand(db_data.get('connection_string'))
 
             databases[name] = DatabaseConfig(
                 name=name,
@@ -123,7 +215,9 @@ class ConfigLoader:
                     name=metric_data['name'],
                     help=metric_data['help'],
                     type=metric_data['type'],
-                    labels=metric_data.get('labels', []),
+                    # Copy so Configs never share lists with the cached YAML document;
+                    # an empty `labels:` key loads as None
+                    labels=list(metric_data.get('labels') or []),
                     value_column=metric_data.get('value_column', 'value')
                 ))
 
@@ -153,20 +247,18 @@ class ConfigLoader:
     @staticmethod
     def _expand_env_vars(value: Optional[str]) -> Optional[str]:
         """Expand environment variables in string values."""
-        if value is None:
-            return None
+        # Only strings containing a ${ placeholder need the regex
+        if value is None or '${' not in value:
+            return value
 
         # Support ${VAR} and ${VAR:-default} syntax
-        import re
-
         def replace_env_var(match):
+            environ_get = os.environ.get
             var_expr = match.group(1)
             if ':-' in var_expr:
                 var_name, default_value = var_expr.split(':-', 1)
-                return os.environ.get(var_name, default_value)
+                return environ_get(var_name, default_value)
             else:
-                return os.environ.get(var_expr, match.group(0))
+                return environ_get(var_expr, match.group(0))
 
-        # Pattern to match ${VAR} or ${VAR:-default}
-        pattern = r'\$\{([^}]+)\}'
-        return re.sub(pattern, replace_env_var, value)
\ No newline at end of file
+        return _ENV_VAR_RE.sub(replace_env_var, value)
@@ -1,34 +1,24 @@
 """Database connection and query execution."""
 
+import re
 import sqlite3
 import logging
-from typing import List, Dict, Any, Optional
+import queue
+import time
+from typing import Iterator, Dict, Any
 from contextlib import contextmanager
 
-try:
-    import pymysql
-    pymysql.install_as_MySQLdb()
-    MYSQL_AVAILABLE = True
-except ImportError:
-    MYSQL_AVAILABLE = False
-
-try:
-    import psycopg2
-    import psycopg2.extras
-    POSTGRESQL_AVAILABLE = True
-except ImportError:
-    POSTGRESQL_AVAILABLE = False
-
-try:
-    import pyodbc
-    MSSQL_AVAILABLE = True
-except ImportError:
-    MSSQL_AVAILABLE = False
-
 from .config import DatabaseConfig
 
 logger = logging.getLogger(__name__)
 
+# Statements PostgreSQL accepts inside DECLARE ... CURSOR FOR, after any
+# leading whitespace and comments
+_PG_CURSOR_STATEMENT_RE = re.compile(
+    r'^(?:\s+|--[^\n]*(?:\n|$)|/\*.*?\*/)*(?:SELECT|WITH|VALUES|TABLE)\b',
+    re.IGNORECASE | re.DOTALL
+)
+
 
 class DatabaseError(Exception):
     """Database operation error."""
@@ -36,92 +26,248 @@ class DatabaseError(Exception):
 
 
 class DatabaseConnection:
-    """Database connection manager."""
+    """Database connection manager with a small pool of reusable connections."""
 
-    def __init__(self, config: DatabaseConfig):
+    def __init__(self, config: DatabaseConfig, pool_size: int = 4, pool_recycle: int = 3600):
         self.config = config
-        self._connection = None
+        self.pool_size = pool_size
+        self.pool_recycle = pool_recycle
+        # Idle connections as (created_at, conn), most recently returned first.
+        # The queue does its own locking, so worker threads can share it.
+        self._pool: "queue.LifoQueue" = queue.LifoQueue(maxsize=pool_size)
+
+        # Resolve driver-specific handlers once instead of branching per call
+        handlers = {
+            "sqlite": (self._connect_sqlite, self._fetch_sqlite, self._ping_sqlite),
+            "mysql": (self._connect_mysql, self._fetch_mysql, self._ping_mysql),
+            "postgresql": (self._connect_postgresql, self._fetch_postgresql, self._ping_postgresql),
+            "mssql": (self._connect_mssql, self._fetch_mssql, self._ping_select),
+        }
+        self._connect, self._fetch, self._ping = handlers.get(
+            config.driver, (self._connect_unsupported, None, None)
+        )
+
+    def _checkout(self):
+        """Take an idle pooled connection, or open a new one."""
+        while True:
+            try:
+                created_at, conn = self._pool.get_nowait()
+            except queue.Empty:
+                return time.monotonic(), self._connect()
+
+            if time.monotonic() - created_at < self.pool_recycle and self._is_alive(conn):
+                return created_at, conn
+            self._close_quietly(conn)
+
+    def _checkin(self, created_at: float, conn):
+        """Return a healthy connection to the pool, closing it if the pool is full."""
+        try:
+            self._pool.put_nowait((created_at, conn))
+        except queue.Full:
+            self._close_quietly(conn)
+
+    def _is_alive(self, conn) -> bool:
+        """Check that an idle pooled connection is still usable."""
+        try:
+            self._ping(conn)
+            return True
+        except Exception as e:
+            logger.debug(f"Discarding dead connection to {self.config.name}: {e}")
+            return False
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception as e:
+            logger.debug(f"Error closing database connection: {e}")
+
+    def close(self):
+        """Close all idle pooled connections."""
+        while True:
+            try:
+                _, conn = self._pool.get_nowait()
+            except queue.Empty:
+                return
+            self._close_quietly(conn)
 
     @contextmanager
     def get_connection(self):
-        """Get database connection with context manager."""
+        """Get a pooled database connection with context manager."""
         try:
-            if self.config.driver == "sqlite":
-                conn = sqlite3.connect(self.config.database)
-                conn.row_factory = sqlite3.Row
-            elif self.config.driver == "mysql":
-                if not MYSQL_AVAILABLE:
-                    raise DatabaseError("MySQL driver not available. Install pymysql.")
-                conn = pymysql.connect(
-                    host=self.config.host,
-                    port=self.config.port or 3306,
-                    database=self.config.database,
-                    user=self.config.username,
-                    password=self.config.password,
-                    cursorclass=pymysql.cursors.DictCursor
-                )
-            elif self.config.driver == "postgresql":
-                if not POSTGRESQL_AVAILABLE:
-                    raise DatabaseError("PostgreSQL driver not available. Install psycopg2.")
-                conn = psycopg2.connect(
-                    host=self.config.host,
-                    port=self.config.port or 5432,
-                    database=self.config.database,
-                    user=self.config.username,
-                    password=self.config.password
-                )
-            elif self.config.driver == "mssql":
-                if not MSSQL_AVAILABLE:
-                    raise DatabaseError("MSSQL driver not available. Install pyodbc.")
-                conn_str = (
-                    f"DRIVER={{ODBC Driver 17 for SQL Server}};"
-                    f"SERVER={self.config.host},{self.config.port or 1433};"
-                    f"DATABASE={self.config.database};"
-                    f"UID={self.config.username};"
-                    f"PWD={self.config.password}"
-                )
-                conn = pyodbc.connect(conn_str)
-            else:
-                raise DatabaseError(f"Unsupported database driver: {self.config.driver}")
-
-            yield conn
+            created_at, conn = self._checkout()
+        except DatabaseError:
+            raise
         except Exception as e:
             logger.error(f"Database connection error: {e}")
             raise DatabaseError(f"Failed to connect to database: {e}")
+
+        released = False
+        try:
+            yield conn
+            released = True
+        finally:
+            if released:
+                self._checkin(created_at, conn)
+            else:
+                # Failed or abandoned mid-stream; connection state is unknown
+                self._close_quietly(conn)
+
+    def _connect_sqlite(self):
+        # Pooled connections may be checked out by different worker threads
+        conn = sqlite3.connect(self.config.database, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _connect_mysql(self):
+        try:
+            import pymysql
+            import pymysql.cursors
+        except ImportError:
+            raise DatabaseError("MySQL driver not available. Install pymysql.")
+        return pymysql.connect(
+            host=self.config.host,
+            port=self.config.port or 3306,
+            database=self.config.database,
+            user=self.config.username,
+            password=self.config.password,
+            cursorclass=pymysql.cursors.DictCursor,
+            # Reused connections must not pin a stale transaction snapshot
+            autocommit=True
+        )
+
+    def _connect_postgresql(self):
+        try:
+            import psycopg2
+        except ImportError:
+            raise DatabaseError("PostgreSQL driver not available. Install psycopg2.")
+        return psycopg2.connect(
+            host=self.config.host,
+            port=self.config.port or 5432,
+            database=self.config.database,
+            user=self.config.username,
+            password=self.config.password
+        )
+
+    def _connect_mssql(self):
+        try:
+            import pyodbc
+        except ImportError:
+            raise DatabaseError("MSSQL driver not available. Install pyodbc.")
+        conn_str = (
+            f"DRIVER={{ODBC Driver 17 for SQL Server}};"
+            f"SERVER={self.config.host},{self.config.port or 1433};"
+            f"DATABASE={self.config.database};"
+            f"UID={self.config.username};"
+            f"PWD={self.config.password}"
+        )
+        return pyodbc.connect(conn_str, autocommit=True)
+
+    def _connect_unsupported(self):
+        raise DatabaseError(f"Unsupported database driver: {self.config.driver}")
+
+    @staticmethod
+    def _ping_sqlite(conn):
+        # Local file handle; nothing on the other end to go away
+        pass
+
+    @staticmethod
+    def _ping_mysql(conn):
+        conn.ping(reconnect=False)
+
+    @staticmethod
+    def _ping_select(conn):
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def _ping_postgresql(conn):
+        DatabaseConnection._ping_select(conn)
+        # Don't leave the ping's implicit transaction open
+        conn.rollback()
+
+    @staticmethod
+    def _fetch_sqlite(conn, sql: str) -> Iterator[Dict[str, Any]]:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(sql)
+            for row in cursor:
+                yield dict(row)
         finally:
-            if 'conn' in locals():
-                conn.close()
+            cursor.close()
+
+    @staticmethod
+    def _fetch_mysql(conn, sql: str) -> Iterator[Dict[str, Any]]:
+        # Unbuffered cursor: rows are read off the socket as iterated
+        import pymysql.cursors
+        with conn.cursor(pymysql.cursors.SSDictCursor) as cursor:
+            cursor.execute(sql)
+            yield from cursor
+
+    @staticmethod
+    def _fetch_postgresql(conn, sql: str) -> Iterator[Dict[str, Any]]:
+        """Stream rows through a server-side (named) cursor where possible.
+
+        DECLARE ... CURSOR FOR only accepts SELECT, WITH, VALUES or TABLE
+        statements, and only a bare trailing ';' can be stripped from them.
+        Other statements (e.g. SHOW), or any statement PostgreSQL rejects
+        when declared as a cursor (e.g. one ending in '; -- comment'), run
+        through a regular client-side cursor instead, which buffers the
+        whole result set as before.
+        """
+        import psycopg2
+        import psycopg2.extras
+        # Named cursors need a transaction, which `with conn` ends so the
+        # next run sees fresh data
+        with conn:
+            cursor = None
+            if _PG_CURSOR_STATEMENT_RE.match(sql):
+                named = conn.cursor(name="sql_exporter",
+                                    cursor_factory=psycopg2.extras.DictCursor)
+                try:
+                    # DECLARE ... CURSOR FOR wraps the statement, so drop a trailing ';'
+                    named.execute(sql.rstrip().rstrip(';'))
+                    cursor = named
+                except psycopg2.ProgrammingError as e:
+                    # The failed DECLARE aborted the transaction and the
+                    # named cursor with it; retry client-side
+                    conn.rollback()
+                    logger.debug(f"Server-side cursor rejected, retrying client-side: {e}")
+
+            if cursor is None:
+                cursor = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+                cursor.execute(sql)
+
+            with cursor:
+                for row in cursor:
+                    yield dict(row)
 
-    def execute_query(self, sql: str, timeout: int = 30) -> List[Dict[str, Any]]:
-        """Execute SQL query and return results."""
+    @staticmethod
+    def _fetch_mssql(conn, sql: str) -> Iterator[Dict[str, Any]]:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(sql)
+            columns = [column[0] for column in cursor.description]
+            for row in cursor:
+                yield dict(zip(columns, row))
+        finally:
+            cursor.close()
+
+    def execute_query(self, sql: str, timeout: int = 30) -> Iterator[Dict[str, Any]]:
+        """Execute SQL query and stream result rows as dicts.
+
+        Rows are fetched incrementally from the driver, and the connection
+        stays checked out until the iterator is exhausted or closed.
+        """
         logger.debug(f"Executing query: {sql}")
 
         with self.get_connection() as conn:
             try:
-                if self.config.driver == "sqlite":
-                    cursor = conn.cursor()
-                    cursor.execute(sql)
-                    rows = cursor.fetchall()
-                    return [dict(row) for row in rows]
-
-                elif self.config.driver == "mysql":
-                    with conn.cursor() as cursor:
-                        cursor.execute(sql)
-                        return cursor.fetchall()
-
-                elif self.config.driver == "postgresql":
-                    with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cursor:
-                        cursor.execute(sql)
-                        rows = cursor.fetchall()
-                        return [dict(row) for row in rows]
-
-                elif self.config.driver == "mssql":
-                    cursor = conn.cursor()
-                    cursor.execute(sql)
-                    columns = [column[0] for column in cursor.description]
-                    rows = cursor.fetchall()
-                    return [dict(zip(columns, row)) for row in rows]
-
+                yield from self._fetch(conn, sql)
             except Exception as e:
                 logger.error(f"Query execution error: {e}")
                 raise DatabaseError(f"Failed to execute query: {e}")
@@ -147,14 +293,19 @@ class QueryExecutor:
         """Add database configuration."""
         self.connections[config.name] = DatabaseConnection(config)
 
-    def execute_query(self, database_name: str, sql: str, timeout: int = 30) -> List[Dict[str, Any]]:
-        """Execute query on specified database."""
+    def execute_query(self, database_name: str, sql: str, timeout: int = 30) -> Iterator[Dict[str, Any]]:
+        """Execute query on specified database, streaming result rows."""
         if database_name not in self.connections:
             raise DatabaseError(f"Database '{database_name}' not configured")
 
         connection = self.connections[database_name]
         return connection.execute_query(sql, timeout)
 
+    def close_all(self):
+        """Close pooled connections for all databases."""
+        for connection in self.connections.values():
+            connection.close()
+
     def test_all_connections(self) -> Dict[str, bool]:
         """Test all database connections."""
         results = {}
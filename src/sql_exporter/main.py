@@ -56,7 +56,12 @@ class SQLExporter:
         """Setup database connections."""
         self.query_executor = QueryExecutor()
 
-        for db_config in self.config.databases.values():
+        # Only connect to databases that some query actually uses
+        used = {query_config.database for query_config in self.config.queries}
+        for name, db_config in self.config.databases.items():
+            if name not in used:
+                logger.info(f"Skipping unused database: {name}")
+                continue
             self.query_executor.add_database(db_config)
             logger.info(f"Added database: {db_config.name} ({db_config.driver})")
 
@@ -125,6 +130,9 @@ class SQLExporter:
         if self.metrics_server:
             self.metrics_server.stop()
 
+        if self.query_executor:
+            self.query_executor.close_all()
+
         logger.info("SQL Exporter stopped")
 
     def collect_once(self, query_name: str = None):
@@ -222,6 +230,7 @@ def test(ctx):
             query_executor.add_database(db_config)
 
         test_results = query_executor.test_all_connections()
+        query_executor.close_all()
 
         click.echo("Database connection test results:")
         for db_name, success in test_results.items():
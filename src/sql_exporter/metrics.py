@@ -1,9 +1,14 @@
 """Prometheus metrics management and export."""
 
+import os
 import time
+import operator
+import sched
 import logging
 import threading
-from typing import Dict, List, Any, Optional
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, Future, wait
+from typing import Dict, List, Any, Optional, Callable, Tuple
 from prometheus_client import Gauge, Counter, Histogram, start_http_server, REGISTRY
 from prometheus_client.core import CollectorRegistry
 
@@ -19,19 +24,44 @@ class MetricsCollector:
     def __init__(self, query_executor: QueryExecutor):
         self.query_executor = query_executor
         self.metrics: Dict[str, Any] = {}
+        # Per-query row updaters, one per configured metric. Keyed by
+        # id(query_config): query names need not be unique, and QueryConfig holds
+        # lists so it is not hashable itself. self.query_configs keeps the
+        # objects alive, so ids stay stable.
+        self._updaters: Dict[int, List[Callable[[Dict[str, Any]], None]]] = {}
+        # Per (metric name, label order, operation) label values -> bound
+        # set/inc/observe of the labelled child. Queries sharing a metric may list
+        # its labels in a different order (the value tuples follow that order) or
+        # declare a different type, so both are part of the key.
+        self._labels_cache: Dict[Tuple[str, Tuple[str, ...], str], Dict[Tuple[str, ...], Callable[[float], None]]] = defaultdict(dict)
+        # Queries sharing (database, SQL, interval) run once and feed all members
+        self._sql_groups: Dict[Tuple[str, str, int], List[QueryConfig]] = {}
         self.query_configs: List[QueryConfig] = []
         self._stop_event = threading.Event()
-        self._threads: List[threading.Thread] = []
+        self._scheduler = sched.scheduler(time.monotonic, self._stop_event.wait)
+        self._scheduler_thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._futures: Dict[Tuple[str, str, int], Future] = {}
 
     def add_query_config(self, query_config: QueryConfig):
         """Add a query configuration for metrics collection."""
         self.query_configs.append(query_config)
+        group_key = (query_config.database, query_config.sql.strip(), query_config.interval)
+        group = self._sql_groups.setdefault(group_key, [])
+        if group:
+            logger.info(f"Query {query_config.name} shares SQL with {group[0].name}, executing once")
+        group.append(query_config)
 
         # Create Prometheus metrics for this query
         for metric_config in query_config.metrics:
             if metric_config.name not in self.metrics:
                 self.metrics[metric_config.name] = self._create_metric(metric_config)
 
+        self._updaters[id(query_config)] = [
+            self._compile_metric_updater(self.metrics[metric_config.name], metric_config)
+            for metric_config in query_config.metrics
+        ]
+
     def _create_metric(self, metric_config: MetricConfig):
         """Create a Prometheus metric based on configuration."""
         metric_name = metric_config.name
@@ -49,112 +79,206 @@ class MetricsCollector:
 
     def _collect_metrics_for_query(self, query_config: QueryConfig):
         """Collect metrics for a single query configuration."""
+        self._collect_metrics_for_group([query_config])
+
+    def _collect_metrics_for_group(self, query_configs: List[QueryConfig]):
+        """Execute SQL shared by one or more query configurations once and update all their metrics."""
+        query_config = query_configs[0]
+        query_names = ", ".join(q.name for q in query_configs)
         try:
-            logger.debug(f"Collecting metrics for query: {query_config.name}")
+            logger.debug(f"Collecting metrics for query: {query_names}")
 
-            # Execute the SQL query
-            results = self.query_executor.execute_query(
+            # Execute the SQL query; rows are streamed and applied one at a time
+            rows = self.query_executor.execute_query(
                 query_config.database,
                 query_config.sql,
-                query_config.timeout
+                max(q.timeout for q in query_configs)
             )
-
-            if not results:
-                logger.warning(f"No results returned for query: {query_config.name}")
-                return
-
-            # Process results for each metric
-            for metric_config in query_config.metrics:
-                metric = self.metrics[metric_config.name]
-                self._update_metric(metric, metric_config, results)
+            # A failing updater only stops its own query; other members keep going
+            active = [(q, self._updaters[id(q)]) for q in query_configs]
+
+            row_count = 0
+            for row in rows:
+                row_count += 1
+                failed = False
+                for index, (member, updaters) in enumerate(active):
+                    try:
+                        for updater in updaters:
+                            updater(row)
+                    except Exception as e:
+                        logger.error(f"Unexpected error for query {member.name}: {e}")
+                        active[index] = (member, None)
+                        failed = True
+                if failed:
+                    active = [entry for entry in active if entry[1] is not None]
+                    if not active:
+                        break
+
+            if not row_count:
+                logger.warning(f"No results returned for query: {query_names}")
 
         except DatabaseError as e:
-            logger.error(f"Database error for query {query_config.name}: {e}")
+            logger.error(f"Database error for query {query_names}: {e}")
         except Exception as e:
-            logger.error(f"Unexpected error for query {query_config.name}: {e}")
+            logger.error(f"Unexpected error for query {query_names}: {e}")
 
-    def _update_metric(self, metric, metric_config: MetricConfig, results: List[Dict[str, Any]]):
-        """Update a Prometheus metric with query results."""
+    def _compile_metric_updater(self, metric, metric_config: MetricConfig) -> Callable[[Dict[str, Any]], None]:
+        """Build a per-row update function with the metric configuration bound once."""
         value_column = metric_config.value_column
+        labels_tuple = tuple(metric_config.labels or ())
 
-        for row in results:
+        if metric_config.type == "gauge":
+            op_name = "set"
+        elif metric_config.type == "counter":
+            op_name = "inc"
+        elif metric_config.type == "histogram":
+            op_name = "observe"
+        else:
+            raise ValueError(f"Unsupported metric type: {metric_config.type}")
+
+        def read_value(row: Dict[str, Any]) -> Optional[float]:
             if value_column not in row:
                 logger.warning(f"Value column '{value_column}' not found in query results")
-                continue
-
+                return None
             try:
-                value = float(row[value_column])
+                return float(row[value_column])
             except (ValueError, TypeError) as e:
                 logger.warning(f"Cannot convert value to float: {row[value_column]}, error: {e}")
-                continue
+                return None
+
+        if not labels_tuple:
+            op = getattr(metric, op_name)
+
+            def update(row: Dict[str, Any]):
+                value = read_value(row)
+                if value is not None:
+                    op(value)
+
+            return update
 
-            # Extract label values
-            label_values = {}
-            for label in metric_config.labels:
+        children = self._labels_cache[(metric_config.name, labels_tuple, op_name)]
+        # itemgetter returns a bare value rather than a 1-tuple for a single key
+        getter = operator.itemgetter(*labels_tuple)
+        single_label = len(labels_tuple) == 1
+
+        def extract_missing(row: Dict[str, Any]) -> Tuple[str, ...]:
+            label_values = []
+            for label in labels_tuple:
                 if label in row:
-                    label_values[label] = str(row[label])
+                    label_values.append(str(row[label]))
                 else:
                     logger.warning(f"Label '{label}' not found in query results")
-                    label_values[label] = ""
+                    label_values.append("")
+            return tuple(label_values)
 
-            # Update metric based on type
-            if metric_config.type == "gauge":
-                if label_values:
-                    metric.labels(**label_values).set(value)
-                else:
-                    metric.set(value)
-            elif metric_config.type == "counter":
-                if label_values:
-                    metric.labels(**label_values).inc(value)
-                else:
-                    metric.inc(value)
-            elif metric_config.type == "histogram":
-                if label_values:
-                    metric.labels(**label_values).observe(value)
-                else:
-                    metric.observe(value)
-
-    def _query_worker(self, query_config: QueryConfig):
-        """Worker thread for periodic query execution."""
-        while not self._stop_event.is_set():
-            start_time = time.time()
+        def update_labeled(row: Dict[str, Any]):
+            value = read_value(row)
+            if value is None:
+                return
 
+            # Extract label values in one C-level call; fall back if any are missing
             try:
-                self._collect_metrics_for_query(query_config)
-            except Exception as e:
-                logger.error(f"Error in query worker for {query_config.name}: {e}")
+                raw = getter(row)
+            except KeyError:
+                key = extract_missing(row)
+            else:
+                key = (str(raw),) if single_label else tuple(map(str, raw))
+
+            child_op = children.get(key)
+            if child_op is None:
+                child = metric.labels(**dict(zip(labels_tuple, key)))
+                child_op = children.setdefault(key, getattr(child, op_name))
+            child_op(value)
+
+        return update_labeled
+
+    def _schedule_next(self, group_key: Tuple[str, str, int], deadline: float):
+        """Dispatch a query group to the worker pool and schedule its next run.
+
+        Runs are scheduled against absolute monotonic deadlines so the
+        interval does not drift with dispatch latency or wall-clock jumps.
+        """
+        if self._stop_event.is_set():
+            return
+
+        query_configs = self._sql_groups[group_key]
+        previous = self._futures.get(group_key)
+        if previous is not None and not previous.done():
+            logger.warning(f"Query {query_configs[0].name} still running, skipping this interval")
+        else:
+            self._futures[group_key] = self._executor.submit(
+                self._run_query, query_configs
+            )
 
-            # Calculate sleep time to maintain interval
-            execution_time = time.time() - start_time
-            sleep_time = max(0, query_config.interval - execution_time)
+        interval = query_configs[0].interval
+        next_deadline = deadline + interval
+        now = time.monotonic()
+        if next_deadline < now:
+            # More than a full interval behind; resync instead of firing a burst of catch-up runs
+            logger.warning(f"Query {query_configs[0].name} fell behind schedule, resetting interval")
+            next_deadline = now + interval
+
+        self._scheduler.enterabs(next_deadline, 0, self._schedule_next, (group_key, next_deadline))
+
+    def _run_query(self, query_configs: List[QueryConfig]):
+        """Worker pool task for a single query group execution."""
+        try:
+            self._collect_metrics_for_group(query_configs)
+        except Exception as e:
+            logger.error(f"Error in query worker for {query_configs[0].name}: {e}")
 
-            if self._stop_event.wait(sleep_time):
+    def _run_scheduler(self):
+        """Scheduler thread loop; returns promptly once stop is requested."""
+        while not self._stop_event.is_set():
+            delay = self._scheduler.run(blocking=False)
+            if delay is None:
                 break
+            self._stop_event.wait(delay)
 
     def start_collection(self):
         """Start periodic metrics collection."""
         logger.info("Starting metrics collection")
 
-        for query_config in self.query_configs:
-            thread = threading.Thread(
-                target=self._query_worker,
-                args=(query_config,),
-                name=f"query-{query_config.name}",
-                daemon=True
-            )
-            thread.start()
-            self._threads.append(thread)
-            logger.info(f"Started collection thread for query: {query_config.name}")
+        if not self._sql_groups:
+            return
+
+        max_workers = min(len(self._sql_groups), (os.cpu_count() or 1) * 2)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="query")
+
+        start = time.monotonic()
+        for group_key, query_configs in self._sql_groups.items():
+            self._scheduler.enterabs(start, 0, self._schedule_next, (group_key, start))
+            for query_config in query_configs:
+                logger.info(f"Scheduled collection for query: {query_config.name}")
+
+        self._scheduler_thread = threading.Thread(
+            target=self._run_scheduler,
+            name="query-scheduler",
+            daemon=True
+        )
+        self._scheduler_thread.start()
 
     def stop_collection(self):
         """Stop metrics collection."""
         logger.info("Stopping metrics collection")
         self._stop_event.set()
 
-        for thread in self._threads:
-            thread.join(timeout=5)
+        if self._scheduler_thread:
+            self._scheduler_thread.join(timeout=5)
+            self._scheduler_thread = None
 
-        self._threads.clear()
+        for event in self._scheduler.queue:
+            try:
+                self._scheduler.cancel(event)
+            except ValueError:
+                pass
+
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            wait(self._futures.values(), timeout=5)
+            self._executor = None
+
+        self._futures.clear()
 
     def collect_once(self, query_name: Optional[str] = None):
         """Collect metrics once (for testing or manual execution)."""
@@ -166,9 +290,9 @@ class MetricsCollector:
                     return
             logger.warning(f"Query '{query_name}' not found")
         else:
-            # Collect for all queries
-            for query_config in self.query_configs:
-                self._collect_metrics_for_query(query_config)
+            # Collect for all queries, executing shared SQL once
+            for query_configs in self._sql_groups.values():
+                self._collect_metrics_for_group(query_configs)
 
 
 class MetricsServer:
@@ -0,0 +1,7 @@
+"""Pytest configuration for SQL Exporter tests."""
+
+import os
+import sys
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
@@ -0,0 +1,51 @@
+"""Tests for configuration loading."""
+
+from sql_exporter.config import ConfigLoader
+
+
+def test_null_labels_load_as_empty_list(tmp_path):
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(
+        "databases:\n"
+        "  db:\n"
+        "    driver: sqlite\n"
+        "    database: test.db\n"
+        "queries:\n"
+        "  - name: q\n"
+        "    database: db\n"
+        "    sql: SELECT 1 AS value\n"
+        "    metrics:\n"
+        "      - name: m\n"
+        "        help: h\n"
+        "        type: gauge\n"
+        "        labels:\n"
+    )
+
+    config = ConfigLoader.load_from_file(str(config_path))
+
+    assert config.queries[0].metrics[0].labels == []
+
+
+def test_cached_load_does_not_share_labels(tmp_path):
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(
+        "databases:\n"
+        "  db:\n"
+        "    driver: sqlite\n"
+        "    database: test.db\n"
+        "queries:\n"
+        "  - name: q\n"
+        "    database: db\n"
+        "    sql: SELECT 1 AS value\n"
+        "    metrics:\n"
+        "      - name: m\n"
+        "        help: h\n"
+        "        type: gauge\n"
+        "        labels: [k]\n"
+    )
+
+    first = ConfigLoader.load_from_file(str(config_path))
+    first.queries[0].metrics[0].labels.append("x")
+    second = ConfigLoader.load_from_file(str(config_path))
+
+    assert second.queries[0].metrics[0].labels == ["k"]
@@ -0,0 +1,25 @@
+"""Tests for database query execution."""
+
+import pytest
+
+from sql_exporter.database import _PG_CURSOR_STATEMENT_RE
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT 1",
+    "select 1;",
+    "  -- leading comment\n/* block\n comment */ WITH a AS (SELECT 1) SELECT * FROM a",
+    "VALUES (1), (2)",
+    "TABLE pg_stat_database",
+])
+def test_postgres_server_side_cursor_statements(sql):
+    assert _PG_CURSOR_STATEMENT_RE.match(sql)
+
+
+@pytest.mark.parametrize("sql", [
+    "SHOW server_version",
+    "EXPLAIN SELECT 1",
+    "selection_count",
+])
+def test_postgres_client_side_cursor_statements(sql):
+    assert not _PG_CURSOR_STATEMENT_RE.match(sql)
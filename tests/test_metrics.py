@@ -0,0 +1,53 @@
+"""Tests for metrics collection."""
+
+from prometheus_client import REGISTRY
+
+from sql_exporter.config import DatabaseConfig, MetricConfig, QueryConfig
+from sql_exporter.database import QueryExecutor
+from sql_exporter.metrics import MetricsCollector
+
+
+def _sqlite_executor(tmp_path):
+    executor = QueryExecutor()
+    executor.add_database(DatabaseConfig(name="db", driver="sqlite", database=str(tmp_path / "test.db")))
+    return executor
+
+
+def test_failing_query_in_shared_sql_group_does_not_stop_others(tmp_path):
+    sql = "SELECT -1 AS value UNION ALL SELECT 5"
+    collector = MetricsCollector(_sqlite_executor(tmp_path))
+    # Counters reject negative increments, so qa fails on the first row
+    collector.add_query_config(QueryConfig(
+        name="qa", sql=sql, database="db",
+        metrics=[MetricConfig(name="group_isolation_counter", help="h", type="counter")]
+    ))
+    collector.add_query_config(QueryConfig(
+        name="qb", sql=sql, database="db",
+        metrics=[MetricConfig(name="group_isolation_gauge", help="h", type="gauge")]
+    ))
+    assert len(collector._sql_groups) == 1
+
+    collector.collect_once()
+
+    assert REGISTRY.get_sample_value("group_isolation_gauge") == 5.0
+    assert REGISTRY.get_sample_value("group_isolation_counter_total") == 0.0
+    collector.query_executor.close_all()
+
+
+def test_shared_metric_uses_each_querys_own_operation(tmp_path):
+    collector = MetricsCollector(_sqlite_executor(tmp_path))
+    # Same metric and labels; the first query creates a gauge and sets it,
+    # the second declares it as a counter and must increment, not set
+    collector.add_query_config(QueryConfig(
+        name="set_query", sql="SELECT 'a' AS k, 3 AS value", database="db",
+        metrics=[MetricConfig(name="shared_op_metric", help="h", type="gauge", labels=["k"])]
+    ))
+    collector.add_query_config(QueryConfig(
+        name="inc_query", sql="SELECT 'a' AS k, 2 AS value", database="db",
+        metrics=[MetricConfig(name="shared_op_metric", help="h", type="counter", labels=["k"])]
+    ))
+
+    collector.collect_once()
+
+    assert REGISTRY.get_sample_value("shared_op_metric", {"k": "a"}) == 5.0
+    collector.query_executor.close_all()